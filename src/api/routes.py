@@ -6,8 +6,8 @@ from typing import Dict, Optional, List
 from pydantic import BaseModel
 from core.logging import get_logger
 from models.licitacion import ChatbotRequest
+from core.container import get_container
 from services.licitacion_service import LicitacionService
-from services.llm_service import LLMService
 
 logger = get_logger(__name__)
 router = APIRouter()
@@ -19,14 +19,13 @@ class ChatbotRequest(BaseModel):
 class ResumenRequest(BaseModel):
     codigos_licitacion: Optional[List[str]] = None
 
-def get_services():
+async def get_services() -> LicitacionService:
     """
-    Crea y retorna las instancias de los servicios necesarios.
+    Retorna la instancia compartida del servicio de licitaciones.
+    Los servicios se crean una sola vez por proceso (ver core.container).
     """
     try:
-        llm_service = LLMService()
-        licitacion_service = LicitacionService(llm_service)
-        return licitacion_service
+        return await get_container().obtener_licitacion_service()
     except Exception as e:
         logger.error(f"Error al inicializar servicios: {str(e)}")
         raise HTTPException(
@@ -157,4 +156,26 @@ async def procesar_licitaciones_endpoint(
         }, status_code=500)
     
     finally:
-        logger.info(f"=== Fin procesamiento de licitaciones [Request: {request_id}] ===\n") 
\ No newline at end of file
+        logger.info(f"=== Fin procesamiento de licitaciones [Request: {request_id}] ===\n") 
+
+@router.get('/metricas')
+async def metricas_endpoint(
+    licitacion_service: LicitacionService = Depends(get_services)
+) -> Dict:
+    """
+    Endpoint que expone las métricas internas del servicio (cachés, límites, latencias).
+    
+    Args:
+        licitacion_service: Instancia del servicio de licitaciones (inyectado)
+    
+    Returns:
+        Dict: Métricas agrupadas por componente
+    """
+    try:
+        return licitacion_service.obtener_metricas()
+    except Exception as e:
+        logger.error(f"❌ Error al obtener métricas: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error interno del servidor: {str(e)}"
+        )
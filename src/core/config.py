@@ -73,6 +73,23 @@ class Settings(BaseSettings):
     USERNAME: str = os.getenv("USERNAME", "admin")
     PASSWORD: str = os.getenv("PASSWORD", "password")
     EMPRESA_ID: int = int(os.getenv("EMPRESA_ID", "1"))
+    TOKEN_REFRESH_MARGIN: float = float(os.getenv("TOKEN_REFRESH_MARGIN", "60"))
+    TOKEN_DEFAULT_TTL: float = float(os.getenv("TOKEN_DEFAULT_TTL", "3600"))
+    
+    # Pool de conexiones HTTP hacia el backend de licitaciones
+    HTTP_POOL_LIMIT: int = int(os.getenv("HTTP_POOL_LIMIT", "100"))
+    HTTP_POOL_LIMIT_PER_HOST: int = int(os.getenv("HTTP_POOL_LIMIT_PER_HOST", "20"))
+    HTTP_KEEPALIVE_TIMEOUT: float = float(os.getenv("HTTP_KEEPALIVE_TIMEOUT", "30"))
+    HTTP_DNS_CACHE_TTL: int = int(os.getenv("HTTP_DNS_CACHE_TTL", "300"))
+    HTTP_CONNECT_TIMEOUT: float = float(os.getenv("HTTP_CONNECT_TIMEOUT", "10"))
+    HTTP_READ_TIMEOUT: float = float(os.getenv("HTTP_READ_TIMEOUT", "120"))
+    
+    # Caché del índice de documentos procesados (segundos)
+    DOCUMENTOS_INDEX_TTL: float = float(os.getenv("DOCUMENTOS_INDEX_TTL", "300"))
+    DOCUMENTOS_INDEX_MAX_STALE: float = float(os.getenv("DOCUMENTOS_INDEX_MAX_STALE", "3600"))
+    
+    # Descargas concurrentes de documentos por licitación
+    DOCUMENT_FETCH_CONCURRENCY: int = int(os.getenv("DOCUMENT_FETCH_CONCURRENCY", "8"))
     
     # App Settings
     BASE_DIR: str = PROJECT_ROOT
@@ -0,0 +1,112 @@
+import asyncio
+import hashlib
+from typing import Optional
+from core.config import settings
+from core.logging import get_logger
+from services.llm_service import LLMService
+from services.licitacion_service import LicitacionService
+
+logger = get_logger(__name__)
+
+class ServiceContainer:
+    """
+    Contenedor de servicios compartidos por todo el proceso.
+
+    Construye una única instancia de LLMService y LicitacionService (con su
+    repositorio, sesión HTTP y encoding de tiktoken) y la reutiliza entre solicitudes.
+    Los servicios solo se reconstruyen cuando cambian las credenciales o
+    cuando se solicita un refresco explícito.
+    """
+
+    def __init__(self, testing: bool = False):
+        self.testing = testing
+        self.llm_service: Optional[LLMService] = None
+        self.licitacion_service: Optional[LicitacionService] = None
+        self._huella: Optional[str] = None
+        self._lock = asyncio.Lock()
+
+    def _huella_credenciales(self) -> str:
+        """Calcula una huella de las credenciales usadas para construir los servicios"""
+        datos = "|".join([
+            settings.OPENAI_API_KEY,
+            settings.OPENAI_MODEL,
+            settings.USERNAME,
+            settings.PASSWORD,
+            str(settings.EMPRESA_ID)
+        ])
+        return hashlib.sha256(datos.encode("utf-8")).hexdigest()
+
+    async def _construir(self) -> None:
+        """Crea las instancias de los servicios y libera las anteriores"""
+        anterior = self.licitacion_service
+        llm_service = LLMService(testing=self.testing)
+        licitacion_service = LicitacionService(llm_service, testing=self.testing)
+        await licitacion_service.repository.abrir_sesion()
+        if not self.testing:
+            try:
+                await licitacion_service.repository.autenticar()
+            except Exception as e:
+                # El token se volverá a solicitar en la primera petición al backend
+                logger.warning(f"No se pudo precalentar la autenticación: {str(e)}")
+        self.llm_service = llm_service
+        self.licitacion_service = licitacion_service
+        self._huella = self._huella_credenciales()
+        logger.info("✅ Servicios compartidos inicializados")
+
+        if anterior is not None:
+            await anterior.repository.cerrar()
+
+    def _requiere_construccion(self) -> bool:
+        return self.licitacion_service is None or self._huella != self._huella_credenciales()
+
+    async def iniciar(self, testing: Optional[bool] = None) -> None:
+        """
+        Inicializa los servicios al arranque de la aplicación.
+
+        Args:
+            testing: Si se indica, sobrescribe el modo testing del contenedor
+        """
+        if testing is not None:
+            self.testing = testing
+        self._lock = asyncio.Lock()
+        async with self._lock:
+            await self._construir()
+
+    async def obtener_licitacion_service(self) -> LicitacionService:
+        """
+        Retorna el servicio de licitaciones compartido.
+        Lo construye de forma perezosa si aún no existe o si cambiaron las credenciales.
+        """
+        if not self._requiere_construccion():
+            return self.licitacion_service
+
+        async with self._lock:
+            # Otra solicitud pudo haberlo construido mientras esperábamos el lock
+            if self._requiere_construccion():
+                if self.licitacion_service is not None:
+                    logger.info("Credenciales modificadas, reconstruyendo servicios...")
+                await self._construir()
+            return self.licitacion_service
+
+    async def refrescar(self) -> LicitacionService:
+        """Fuerza la reconstrucción de los servicios (p. ej. tras renovar credenciales)"""
+        async with self._lock:
+            logger.info("Refrescando servicios compartidos...")
+            await self._construir()
+            return self.licitacion_service
+
+    async def cerrar(self) -> None:
+        """Libera los servicios al cierre de la aplicación"""
+        async with self._lock:
+            if self.licitacion_service is not None:
+                await self.licitacion_service.repository.cerrar()
+            self.llm_service = None
+            self.licitacion_service = None
+            self._huella = None
+            logger.info("Servicios compartidos liberados")
+
+# Instancia única del contenedor para todo el proceso
+container = ServiceContainer(testing=settings.TESTING)
+
+def get_container() -> ServiceContainer:
+    return container
@@ -9,6 +9,7 @@ import os
 import uvicorn
 from core.config import settings
 from core.logging import get_logger, setup_logging
+from core.container import get_container
 from api.routes import router
 from services.licitacion_service import LicitacionService
 from services.llm_service import LLMService
@@ -17,26 +18,22 @@ import logging
 # Configuración del logger
 logger = logging.getLogger(__name__)
 
-# Variables globales para servicios
-llm_service = None
-licitacion_service = None
+# Contenedor global de servicios compartidos
+container = get_container()
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """
     Manejador del ciclo de vida de la aplicación.
-    Inicializa los servicios y recursos necesarios.
+    Inicializa los servicios compartidos una sola vez y los libera al cierre.
     """
-    global llm_service, licitacion_service
-    
     # Configuración al inicio
     setup_logging()
     logger.info("Iniciando aplicación...")
     
     # Inicializar servicios
     try:
-        llm_service = LLMService(testing=True)
-        licitacion_service = LicitacionService(llm_service, testing=True)
+        await container.iniciar(testing=settings.TESTING)
         logger.info("Servicios inicializados correctamente")
     except Exception as e:
         logger.error(f"Error al inicializar servicios: {str(e)}")
@@ -47,7 +44,7 @@ async def lifespan(app: FastAPI):
     # Limpieza al cierre
     try:
         logger.info("Cerrando aplicación...")
-        # Aquí puedes agregar código de limpieza si es necesario
+        await container.cerrar()
     except Exception as e:
         logger.error(f"Error al cerrar la aplicación: {str(e)}")
 
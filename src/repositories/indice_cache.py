@@ -0,0 +1,105 @@
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import asyncio
+import time
+from core.logging import get_logger
+
+logger = get_logger(__name__)
+
+class IndiceDocumentosCache:
+    """
+    Caché en memoria del índice agrupado de documentos procesados (código → rutas).
+
+    Sigue la estrategia stale-while-revalidate:
+    - Mientras la edad del índice es menor que el TTL se sirve directamente (hit).
+    - Entre el TTL y TTL + max_stale se sirve el índice antiguo y se refresca en segundo plano.
+    - Sin índice, o con uno demasiado antiguo, la solicitud espera la descarga (miss).
+    Las descargas son single-flight: solicitudes concurrentes comparten la misma tarea.
+    """
+
+    def __init__(
+        self,
+        cargar: Callable[[], Awaitable[Dict[str, List[str]]]],
+        ttl: float = 300,
+        max_stale: float = 3600
+    ):
+        self._cargar = cargar
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self._indice: Optional[Dict[str, List[str]]] = None
+        self._actualizado: float = 0
+        self._tarea_refresco: Optional[asyncio.Task] = None
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refrescos = 0
+        self.errores = 0
+
+    @property
+    def edad(self) -> Optional[float]:
+        """Segundos desde la última actualización del índice"""
+        if self._indice is None:
+            return None
+        return time.monotonic() - self._actualizado
+
+    async def obtener(self) -> Dict[str, List[str]]:
+        """
+        Retorna el índice agrupado. El diccionario es compartido y no debe modificarse.
+        """
+        edad = self.edad
+        if edad is not None and edad < self.ttl:
+            self.hits += 1
+            return self._indice
+
+        if edad is not None and edad < self.ttl + self.max_stale:
+            self.stale_hits += 1
+            self._iniciar_refresco()
+            return self._indice
+
+        self.misses += 1
+        try:
+            return await asyncio.shield(self._iniciar_refresco())
+        except Exception:
+            if self._indice is not None:
+                logger.warning("Error al refrescar el índice de documentos, se sirve la versión anterior")
+                return self._indice
+            raise
+
+    def invalidar(self) -> None:
+        """Fuerza la descarga del índice en la próxima solicitud"""
+        self._indice = None
+        self._actualizado = 0
+
+    def estadisticas(self) -> Dict[str, Any]:
+        """Contadores de uso de la caché"""
+        edad = self.edad
+        return {
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "refrescos": self.refrescos,
+            "errores": self.errores,
+            "edad_segundos": round(edad, 2) if edad is not None else None,
+            "licitaciones": len(self._indice) if self._indice is not None else 0
+        }
+
+    def _iniciar_refresco(self) -> asyncio.Task:
+        """Inicia una descarga si no hay una en curso y retorna la tarea compartida"""
+        if self._tarea_refresco is None or self._tarea_refresco.done():
+            self._tarea_refresco = asyncio.create_task(self._refrescar())
+            self._tarea_refresco.add_done_callback(self._registrar_resultado)
+        return self._tarea_refresco
+
+    def _registrar_resultado(self, tarea: asyncio.Task) -> None:
+        # Consumir la excepción de refrescos en segundo plano para evitar warnings
+        if not tarea.cancelled() and tarea.exception() is not None:
+            self.errores += 1
+            logger.warning(f"Refresco del índice de documentos fallido: {str(tarea.exception())}")
+
+    async def _refrescar(self) -> Dict[str, List[str]]:
+        start_time = time.time()
+        indice = await self._cargar()
+        self._indice = indice
+        self._actualizado = time.monotonic()
+        self.refrescos += 1
+        logger.info(f"Índice de documentos actualizado en {time.time() - start_time:.2f} segundos")
+        return indice
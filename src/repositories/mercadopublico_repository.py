@@ -1,19 +1,12 @@
 from typing import List, Dict, Any, Optional
-import requests
-from datetime import datetime
-import time
 from core.config import settings
 from core.logging import get_logger
-import urllib3
 from models.licitacion import Licitacion, Documento
-import logging
+from repositories.token_manager import TokenManager
+from repositories.indice_cache import IndiceDocumentosCache
 import aiohttp
-import json
 import ssl
 
-# Deshabilitar advertencias de SSL
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-
 # Crear un contexto SSL que no verifique certificados
 ssl_context = ssl.create_default_context()
 ssl_context.check_hostname = False
@@ -24,10 +17,10 @@ logger = get_logger(__name__)
 class MercadoPublicoRepository:
     def __init__(self, testing: bool = False):
         self.testing = testing
-        self.session = requests.Session()
-        self.session.verify = False  # Deshabilitar verificación SSL
-        self.token = None
-        self.token_expiry = None
+        self.headers = {
+            "Content-Type": "application/json",
+            "Accept": "application/json"
+        }
         self.base_url = settings.BASE_URL
         self.endpoints = {
             "documentos_procesados": settings.DOCUMENTOS_PROCESADOS_URL,
@@ -39,131 +32,131 @@ class MercadoPublicoRepository:
         # Configuración SSL para aiohttp
         self.ssl_context = ssl_context
         
-        if not testing:
-            self._authenticate()
-        else:
-            # En modo testing, configurar un token de prueba
-            self.token = "test_token"
-            self.token_expiry = datetime.now().timestamp() + 3600
-            self.session.headers.update({
-                "Authorization": f"Bearer {self.token}",
-                "Content-Type": "application/json"
-            })
-
-    def _authenticate(self) -> None:
-        """Autentica con el servicio de Mercado Público"""
-        try:
-            auth_data = {
+        # Sesión aiohttp compartida (pool de conexiones), se abre de forma perezosa
+        self._http_session: Optional[aiohttp.ClientSession] = None
+        
+        # Gestor asíncrono del token; el login se realiza en la primera petición
+        self.token_manager = TokenManager(
+            self.abrir_sesion,
+            auth_url=settings.AUTH_URL,
+            credenciales={
                 "username": settings.USERNAME,
                 "password": settings.PASSWORD,
                 "empresa_id": int(settings.EMPRESA_ID)  # Asegurar que sea entero
-            }
-            
-            logger.info(f"Intentando autenticar con usuario: {settings.USERNAME} y empresa_id: {auth_data['empresa_id']}")
-            
-            # Agregar headers específicos para la autenticación
-            headers = {
-                "Content-Type": "application/json",
-                "Accept": "application/json"
-            }
-            
-            response = self.session.post(
-                settings.AUTH_URL,
-                json=auth_data,
-                headers=headers,
-                verify=False
-            )
-            
-            # Log detallado de la respuesta
-            logger.info(f"Respuesta de autenticación: {response.status_code}")
-            logger.info(f"Headers de respuesta: {dict(response.headers)}")
-            
-            try:
-                response_data = response.json()
-                logger.info(f"Respuesta del servidor: {response_data}")
-            except json.JSONDecodeError:
-                logger.error(f"Respuesta no JSON: {response.text}")
-                raise ValueError("Respuesta del servidor no es JSON válido")
-            
-            if response.status_code != 200:
-                error_msg = response_data.get('msg', 'Error desconocido')
-                logger.error(f"Error de autenticación: {error_msg}")
-                raise ValueError(f"Error de autenticación: {response.status_code} - {error_msg}")
-            
-            if not response_data:
-                logger.error("Respuesta vacía del servidor")
-                raise ValueError("Respuesta vacía del servidor")
-                
-            # Buscar el token en la respuesta
-            token = response_data.get("access_token") or response_data.get("token")
-            if not token:
-                logger.error(f"Respuesta sin token: {response_data}")
-                raise ValueError("No se recibió token de autenticación")
-                
-            self.token = token
-            self.token_expiry = datetime.now().timestamp() + 3600  # 1 hora
-            self.session.headers.update({
-                "Authorization": f"Bearer {self.token}",
-                "Content-Type": "application/json",
-                "Accept": "application/json"
-            })
-            logger.info("✅ Autenticación exitosa")
-                
-        except requests.exceptions.RequestException as e:
-            logger.error(f"❌ Error de conexión en autenticación: {str(e)}")
-            raise
-        except Exception as e:
-            logger.error(f"❌ Error en autenticación: {str(e)}")
-            raise
-
-    def _make_request(self, method: str, url: str, **kwargs) -> Dict[str, Any]:
-        """Realiza una petición HTTP con manejo de errores"""
-        try:
-            if not self.testing and (not self.token or datetime.now().timestamp() >= self.token_expiry):
-                self._authenticate()
-                
-            response = self.session.request(method, url, **kwargs)
-            response.raise_for_status()
-            return response.json()
-            
-        except requests.exceptions.RequestException as e:
-            logging.error(f"❌ Error en petición HTTP: {str(e)}")
-            raise
+            },
+            margen_refresco=settings.TOKEN_REFRESH_MARGIN,
+            ttl_por_defecto=settings.TOKEN_DEFAULT_TTL,
+            testing=testing
+        )
+        
+        # Índice agrupado de documentos procesados con TTL y refresco en segundo plano
+        self.indice_cache = IndiceDocumentosCache(
+            self._descargar_documentos_procesados,
+            ttl=settings.DOCUMENTOS_INDEX_TTL,
+            max_stale=settings.DOCUMENTOS_INDEX_MAX_STALE
+        )
+
+    @property
+    def token(self) -> Optional[str]:
+        return self.token_manager.token
+
+    @property
+    def token_expiry(self) -> float:
+        return self.token_manager.expiracion
+
+    async def autenticar(self) -> str:
+        """Obtiene un token válido (útil para precalentar la autenticación al arranque)"""
+        return await self.token_manager.obtener_token()
+
+    def _crear_sesion_http(self) -> aiohttp.ClientSession:
+        """Crea una sesión aiohttp con pool de conexiones, keep-alive y caché DNS"""
+        connector = aiohttp.TCPConnector(
+            limit=settings.HTTP_POOL_LIMIT,
+            limit_per_host=settings.HTTP_POOL_LIMIT_PER_HOST,
+            keepalive_timeout=settings.HTTP_KEEPALIVE_TIMEOUT,
+            ttl_dns_cache=settings.HTTP_DNS_CACHE_TTL,
+            ssl=self.ssl_context
+        )
+        timeout = aiohttp.ClientTimeout(
+            total=None,
+            connect=settings.HTTP_CONNECT_TIMEOUT,
+            sock_read=settings.HTTP_READ_TIMEOUT
+        )
+        return aiohttp.ClientSession(connector=connector, timeout=timeout)
+
+    async def abrir_sesion(self) -> aiohttp.ClientSession:
+        """
+        Retorna la sesión HTTP compartida, creándola si no existe o fue cerrada
+        """
+        if self._http_session is None or self._http_session.closed:
+            self._http_session = self._crear_sesion_http()
+            logger.info("Sesión HTTP compartida abierta")
+        return self._http_session
+
+    async def cerrar(self) -> None:
+        """Cierra la sesión HTTP compartida y libera sus conexiones"""
+        if self._http_session is not None and not self._http_session.closed:
+            await self._http_session.close()
+            logger.info("Sesión HTTP compartida cerrada")
+        self._http_session = None
+
+    async def _headers(self) -> Dict[str, str]:
+        """Headers de autenticación para las peticiones aiohttp"""
+        token = await self.token_manager.obtener_token()
+        return {**self.headers, "Authorization": f"Bearer {token}"}
+
+    def _verificar_autorizacion(self, status: int) -> None:
+        """Fuerza la renovación del token si el backend lo rechaza"""
+        if status == 401:
+            logger.warning("Token rechazado por el backend, se renovará en la próxima petición")
+            self.token_manager.invalidar()
 
     async def obtener_documentos_procesados(self) -> Dict[str, List[str]]:
         """
-        Obtiene y agrupa los documentos procesados por código de licitación
+        Obtiene los documentos procesados agrupados por código de licitación.
+        El índice se sirve desde caché (stale-while-revalidate) y se refresca en segundo plano.
         """
         try:
             if self.testing:
                 return {"test_code": ["test_path"]}
 
-            async with aiohttp.ClientSession(headers=self.session.headers) as session:
-                async with session.get(self.endpoints["documentos_procesados"], ssl=self.ssl_context) as response:
-                    if response.status == 200:
-                        datos = await response.json()
-                        
-                        # Agrupar por código de licitación
-                        listas_agrupadas = {}
-                        for dato in datos:
-                            codigo = dato.get('codigo_licitacion')
-                            ruta = dato.get('ruta_documento')
-                            
-                            if codigo and ruta:
-                                if codigo not in listas_agrupadas:
-                                    listas_agrupadas[codigo] = []
-                                listas_agrupadas[codigo].append(ruta)
-                        
-                        logger.info(f"Total de licitaciones agrupadas: {len(listas_agrupadas)}")
-                        return listas_agrupadas
-                    else:
-                        logger.error(f"Error al obtener documentos procesados: {response.status}")
-                        return {}
+            return await self.indice_cache.obtener()
 
         except Exception as e:
             logger.error(f"Error en obtener_documentos_procesados: {str(e)}", exc_info=True)
             return {}
 
+    async def _descargar_documentos_procesados(self) -> Dict[str, List[str]]:
+        """
+        Descarga el listado completo de documentos procesados y lo agrupa por código de licitación
+        """
+        session = await self.abrir_sesion()
+        async with session.get(self.endpoints["documentos_procesados"], headers=await self._headers()) as response:
+            if response.status != 200:
+                logger.error(f"Error al obtener documentos procesados: {response.status}")
+                self._verificar_autorizacion(response.status)
+                raise ValueError(f"Error al obtener documentos procesados: {response.status}")
+
+            datos = await response.json()
+
+        # Agrupar por código de licitación
+        listas_agrupadas = {}
+        for dato in datos:
+            codigo = dato.get('codigo_licitacion')
+            ruta = dato.get('ruta_documento')
+
+            if codigo and ruta:
+                if codigo not in listas_agrupadas:
+                    listas_agrupadas[codigo] = []
+                listas_agrupadas[codigo].append(ruta)
+
+        logger.info(f"Total de licitaciones agrupadas: {len(listas_agrupadas)}")
+        return listas_agrupadas
+
+    def estadisticas_indice(self) -> Dict[str, Any]:
+        """Contadores de la caché del índice de documentos procesados"""
+        return self.indice_cache.estadisticas()
+
     async def obtener_contenido_documento(self, ruta: str, codigo_licitacion: str) -> str:
         """
         Obtiene el contenido de un documento específico
@@ -177,14 +170,15 @@ class MercadoPublicoRepository:
                 "codigo_licitacion": codigo_licitacion
             }
 
-            async with aiohttp.ClientSession(headers=self.session.headers) as session:
-                async with session.get(self.endpoints["documento_content"], params=params, ssl=self.ssl_context) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        return data.get("contenido", "")
-                    else:
-                        logger.error(f"Error al obtener contenido del documento: {response.status}")
-                        return ""
+            session = await self.abrir_sesion()
+            async with session.get(self.endpoints["documento_content"], params=params, headers=await self._headers()) as response:
+                if response.status == 200:
+                    data = await response.json()
+                    return data.get("contenido", "")
+                else:
+                    logger.error(f"Error al obtener contenido del documento: {response.status}")
+                    self._verificar_autorizacion(response.status)
+                    return ""
 
         except Exception as e:
             logger.error(f"Error en obtener_contenido_documento: {str(e)}", exc_info=True)
@@ -200,15 +194,16 @@ class MercadoPublicoRepository:
 
             params = {"codigo_licitacion": codigo_licitacion}
             
-            async with aiohttp.ClientSession(headers=self.session.headers) as session:
-                async with session.get(self.endpoints["respuesta_ia"], params=params, ssl=self.ssl_context) as response:
-                    if response.status == 200:
-                        return await response.json()
-                    elif response.status == 404:
-                        return None
-                    else:
-                        logger.error(f"Error al verificar respuesta IA: {response.status}")
-                        return None
+            session = await self.abrir_sesion()
+            async with session.get(self.endpoints["respuesta_ia"], params=params, headers=await self._headers()) as response:
+                if response.status == 200:
+                    return await response.json()
+                elif response.status == 404:
+                    return None
+                else:
+                    logger.error(f"Error al verificar respuesta IA: {response.status}")
+                    self._verificar_autorizacion(response.status)
+                    return None
 
         except Exception as e:
             logger.error(f"Error en obtener_respuesta_ia: {str(e)}", exc_info=True)
@@ -227,14 +222,15 @@ class MercadoPublicoRepository:
                 "resultado_analisis": resultado_analisis
             }
 
-            async with aiohttp.ClientSession(headers=self.session.headers) as session:
-                async with session.post(self.endpoints["guardar_respuesta"], json=data, ssl=self.ssl_context) as response:
-                    if response.status == 200:
-                        logger.info(f"Respuesta IA guardada exitosamente para licitación {codigo_licitacion}")
-                        return True
-                    else:
-                        logger.error(f"Error al guardar respuesta IA: {response.status}")
-                        return False
+            session = await self.abrir_sesion()
+            async with session.post(self.endpoints["guardar_respuesta"], json=data, headers=await self._headers()) as response:
+                if response.status == 200:
+                    logger.info(f"Respuesta IA guardada exitosamente para licitación {codigo_licitacion}")
+                    return True
+                else:
+                    logger.error(f"Error al guardar respuesta IA: {response.status}")
+                    self._verificar_autorizacion(response.status)
+                    return False
 
         except Exception as e:
             logger.error(f"Error en guardar_respuesta_ia: {str(e)}", exc_info=True)
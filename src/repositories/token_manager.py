@@ -0,0 +1,162 @@
+from typing import Any, Awaitable, Callable, Dict, Optional
+import asyncio
+import base64
+import json
+import time
+import aiohttp
+from core.logging import get_logger
+
+logger = get_logger(__name__)
+
+class TokenManager:
+    """
+    Gestor asíncrono del token de autenticación del backend de licitaciones.
+
+    - Renueva el token de forma proactiva antes de su expiración.
+    - Obtiene la expiración real desde la respuesta (expires_in) o desde el
+      claim "exp" del JWT, usando un TTL por defecto solo como último recurso.
+    - Aplica single-flight: N solicitudes concurrentes con el token expirado
+      disparan un único login y todas reciben el nuevo token.
+    """
+
+    def __init__(
+        self,
+        obtener_sesion: Callable[[], Awaitable[aiohttp.ClientSession]],
+        auth_url: str,
+        credenciales: Dict[str, Any],
+        margen_refresco: float = 60,
+        ttl_por_defecto: float = 3600,
+        testing: bool = False
+    ):
+        self._obtener_sesion = obtener_sesion
+        self.auth_url = auth_url
+        self.credenciales = credenciales
+        self.margen_refresco = margen_refresco
+        self.ttl_por_defecto = ttl_por_defecto
+        self.testing = testing
+        self.token: Optional[str] = None
+        self.expiracion: float = 0
+        self._tarea_refresco: Optional[asyncio.Task] = None
+
+        if testing:
+            # En modo testing, configurar un token de prueba
+            self.token = "test_token"
+            self.expiracion = time.time() + ttl_por_defecto
+
+    def _token_vigente(self, ahora: float) -> bool:
+        return bool(self.token) and ahora < self.expiracion
+
+    async def obtener_token(self) -> str:
+        """
+        Retorna un token válido, renovándolo si es necesario
+        """
+        if self.testing:
+            return self.token
+
+        ahora = time.time()
+        if self._token_vigente(ahora):
+            if ahora >= self.expiracion - self.margen_refresco:
+                # Refresco proactivo: se usa el token vigente mientras se renueva en segundo plano
+                self._iniciar_refresco()
+            return self.token
+
+        # Token expirado o inexistente: todas las solicitudes esperan el mismo login
+        return await asyncio.shield(self._iniciar_refresco())
+
+    def invalidar(self) -> None:
+        """Marca el token como expirado para forzar su renovación en la próxima solicitud"""
+        self.expiracion = 0
+
+    def _iniciar_refresco(self) -> asyncio.Task:
+        """Inicia un login si no hay uno en curso y retorna la tarea compartida"""
+        if self._tarea_refresco is None or self._tarea_refresco.done():
+            self._tarea_refresco = asyncio.create_task(self._autenticar())
+            self._tarea_refresco.add_done_callback(self._registrar_resultado)
+        return self._tarea_refresco
+
+    @staticmethod
+    def _registrar_resultado(tarea: asyncio.Task) -> None:
+        # Consumir la excepción de refrescos en segundo plano para evitar warnings
+        if not tarea.cancelled() and tarea.exception() is not None:
+            logger.warning(f"Refresco de token fallido: {str(tarea.exception())}")
+
+    async def _autenticar(self) -> str:
+        """Autentica con el servicio de Mercado Público"""
+        try:
+            logger.info(f"Intentando autenticar con usuario: {self.credenciales.get('username')} y empresa_id: {self.credenciales.get('empresa_id')}")
+
+            headers = {
+                "Content-Type": "application/json",
+                "Accept": "application/json"
+            }
+
+            session = await self._obtener_sesion()
+            async with session.post(self.auth_url, json=self.credenciales, headers=headers) as response:
+                logger.info(f"Respuesta de autenticación: {response.status}")
+
+                try:
+                    response_data = await response.json(content_type=None)
+                except (json.JSONDecodeError, aiohttp.ContentTypeError):
+                    logger.error("Respuesta de autenticación no JSON")
+                    raise ValueError("Respuesta del servidor no es JSON válido")
+
+                if response.status != 200:
+                    error_msg = (response_data or {}).get('msg', 'Error desconocido')
+                    logger.error(f"Error de autenticación: {error_msg}")
+                    raise ValueError(f"Error de autenticación: {response.status} - {error_msg}")
+
+            if not response_data:
+                logger.error("Respuesta vacía del servidor")
+                raise ValueError("Respuesta vacía del servidor")
+
+            # Buscar el token en la respuesta
+            token = response_data.get("access_token") or response_data.get("token")
+            if not token:
+                logger.error("Respuesta sin token")
+                raise ValueError("No se recibió token de autenticación")
+
+            self.token = token
+            self.expiracion = self._calcular_expiracion(response_data, token)
+            logger.info(f"✅ Autenticación exitosa, token válido por {self.expiracion - time.time():.0f} segundos")
+            return token
+
+        except aiohttp.ClientError as e:
+            logger.error(f"❌ Error de conexión en autenticación: {str(e)}")
+            raise
+        except Exception as e:
+            logger.error(f"❌ Error en autenticación: {str(e)}")
+            raise
+
+    def _calcular_expiracion(self, response_data: Dict[str, Any], token: str) -> float:
+        """
+        Determina el instante de expiración del token.
+        Prioriza expires_in de la respuesta, luego el claim exp del JWT y por último el TTL por defecto.
+        """
+        ahora = time.time()
+        expires_in = response_data.get("expires_in")
+        if expires_in:
+            try:
+                return ahora + float(expires_in)
+            except (TypeError, ValueError):
+                logger.warning(f"expires_in inválido en la respuesta: {expires_in}")
+
+        exp = self._leer_exp_jwt(token)
+        if exp:
+            return exp
+
+        logger.warning(f"No se pudo determinar la expiración del token, usando {self.ttl_por_defecto} segundos")
+        return ahora + self.ttl_por_defecto
+
+    @staticmethod
+    def _leer_exp_jwt(token: str) -> Optional[float]:
+        """Lee el claim exp de un JWT sin validar su firma"""
+        try:
+            partes = token.split(".")
+            if len(partes) != 3:
+                return None
+            payload = partes[1] + "=" * (-len(partes[1]) % 4)
+            claims = json.loads(base64.urlsafe_b64decode(payload))
+            exp = claims.get("exp")
+            return float(exp) if exp else None
+        except (ValueError, TypeError, json.JSONDecodeError):
+            return None
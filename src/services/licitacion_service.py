@@ -1,4 +1,5 @@
 from datetime import datetime
+import asyncio
 import json
 from typing import List, Dict, Any, Optional
 import tiktoken
@@ -150,24 +151,31 @@ class LicitacionService:
             rutas = listas_agrupadas[codigo_licitacion]
             logger.info(f"Procesando {len(rutas)} documentos para la licitación {codigo_licitacion}")
             
-            documentos_texto = []
-            for idx, ruta in enumerate(rutas, 1):
-                try:
-                    logger.info(f"Obteniendo contenido del documento {idx}/{len(rutas)}: {ruta}")
-                    contenido = await self.repository.obtener_contenido_documento(ruta, codigo_licitacion)
-                    if contenido and contenido.strip():
-                        logger.info(f"✅ Documento {idx} obtenido exitosamente")
-                        # Formatear el contenido del documento para mejor contexto
-                        documento_formateado = f"""
+            # Las descargas se realizan en paralelo, acotadas por un semáforo
+            semaforo = asyncio.Semaphore(max(1, self.settings.DOCUMENT_FETCH_CONCURRENCY))
+            
+            async def obtener_documento(idx: int, ruta: str) -> Optional[str]:
+                async with semaforo:
+                    try:
+                        logger.info(f"Obteniendo contenido del documento {idx}/{len(rutas)}: {ruta}")
+                        contenido = await self.repository.obtener_contenido_documento(ruta, codigo_licitacion)
+                        if contenido and contenido.strip():
+                            logger.info(f"✅ Documento {idx} obtenido exitosamente")
+                            # Formatear el contenido del documento para mejor contexto
+                            return f"""
 === DOCUMENTO {idx}: {ruta} ===
 {contenido.strip()}
 {"="*50}"""
-                        documentos_texto.append(documento_formateado)
-                    else:
                         logger.warning(f"⚠️ Documento {idx} está vacío: {ruta}")
-                except Exception as doc_error:
-                    logger.error(f"❌ Error al obtener documento {idx}: {str(doc_error)}")
-                    continue
+                    except Exception as doc_error:
+                        logger.error(f"❌ Error al obtener documento {idx}: {str(doc_error)}")
+                    return None
+            
+            # gather conserva el orden de las rutas y con ello la numeración de los documentos
+            resultados = await asyncio.gather(*[
+                obtener_documento(idx, ruta) for idx, ruta in enumerate(rutas, 1)
+            ])
+            documentos_texto = [documento for documento in resultados if documento]
 
             if not documentos_texto:
                 raise ValueError("No se pudo obtener contenido de ningún documento")
@@ -224,6 +232,14 @@ class LicitacionService:
             logger.error(f"Error procesando consulta: {str(e)}", exc_info=True)
             raise ValueError(f"Error al procesar la consulta: {str(e)}")
 
+    def obtener_metricas(self) -> Dict[str, Any]:
+        """
+        Retorna las métricas internas del servicio (cachés, límites, etc.)
+        """
+        return {
+            "indice_documentos": self.repository.estadisticas_indice()
+        }
+
     async def procesar_licitaciones(self, codigos_licitacion: Optional[List[str]] = None) -> Dict:
         """
         Procesa licitaciones y genera resúmenes. Puede procesar todas las licitaciones o un subconjunto específico.
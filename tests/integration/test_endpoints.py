@@ -12,8 +12,9 @@ class TestEndpoints:
 
     @pytest.fixture
     def mock_licitacion_service(self):
-        with patch('api.routes.LicitacionService') as mock:
-            instance = mock.return_value
+        with patch('api.routes.get_container') as mock_container:
+            instance = MagicMock()
+            mock_container.return_value.obtener_licitacion_service = AsyncMock(return_value=instance)
             instance.procesar_licitaciones = AsyncMock()
             instance.procesar_consulta_chatbot = AsyncMock()
             instance.repository = MagicMock()
@@ -143,4 +144,16 @@ class TestEndpoints:
         assert response.json() == {
             "message": "Error en procesamiento de licitaciones",
             "error": "Error de prueba"
-        } 
\ No newline at end of file
+        } 
+
+    def test_metricas_endpoint(self, client, mock_licitacion_service):
+        # Configurar el mock
+        metricas = {"indice_documentos": {"hits": 3, "misses": 1}}
+        mock_licitacion_service.obtener_metricas = MagicMock(return_value=metricas)
+        
+        # Realizar la solicitud
+        response = client.get("/metricas")
+        
+        # Verificar respuesta
+        assert response.status_code == 200
+        assert response.json() == metricas
@@ -0,0 +1,66 @@
+import pytest
+import asyncio
+from unittest.mock import patch, MagicMock, AsyncMock
+from core.container import ServiceContainer
+
+@pytest.fixture
+def container():
+    """Fixture que proporciona un contenedor en modo testing"""
+    return ServiceContainer(testing=True)
+
+@pytest.mark.unit
+class TestServiceContainer:
+    """Tests unitarios para el contenedor de servicios compartidos"""
+
+    @pytest.mark.asyncio
+    async def test_reutiliza_instancia(self, container):
+        """Los servicios se construyen una sola vez y se comparten entre solicitudes"""
+        primero = await container.obtener_licitacion_service()
+        segundo = await container.obtener_licitacion_service()
+        assert primero is segundo
+        assert primero.llm_service is container.llm_service
+        await container.cerrar()
+
+    @pytest.mark.asyncio
+    async def test_construccion_unica_concurrente(self, container):
+        """Solicitudes concurrentes construyen los servicios una sola vez"""
+        with patch('core.container.LLMService') as mock_llm, \
+             patch('core.container.LicitacionService') as mock_licitacion:
+            def crear_servicio(*args, **kwargs):
+                servicio = MagicMock()
+                servicio.repository.abrir_sesion = AsyncMock()
+                return servicio
+            mock_licitacion.side_effect = crear_servicio
+            servicios = await asyncio.gather(*[container.obtener_licitacion_service() for _ in range(10)])
+
+            assert mock_llm.call_count == 1
+            assert mock_licitacion.call_count == 1
+            assert all(servicio is servicios[0] for servicio in servicios)
+
+    @pytest.mark.asyncio
+    async def test_reconstruye_al_cambiar_credenciales(self, container):
+        """Un cambio de credenciales provoca la reconstrucción de los servicios"""
+        primero = await container.obtener_licitacion_service()
+        with patch('core.container.settings') as mock_settings:
+            mock_settings.OPENAI_API_KEY = "sk-nueva-key"
+            mock_settings.OPENAI_MODEL = "gpt-4o-mini"
+            mock_settings.USERNAME = "otro_usuario"
+            mock_settings.PASSWORD = "otra_password"
+            mock_settings.EMPRESA_ID = 2
+            segundo = await container.obtener_licitacion_service()
+        assert primero is not segundo
+        assert primero.repository._http_session is None
+        await container.cerrar()
+
+    @pytest.mark.asyncio
+    async def test_refrescar_y_cerrar(self, container):
+        """refrescar reconstruye los servicios y cerrar los libera"""
+        primero = await container.obtener_licitacion_service()
+        segundo = await container.refrescar()
+        assert primero is not segundo
+        assert not segundo.repository._http_session.closed
+
+        await container.cerrar()
+        assert segundo.repository._http_session is None
+        assert container.licitacion_service is None
+        assert container.llm_service is None
@@ -0,0 +1,92 @@
+import pytest
+import asyncio
+from unittest.mock import AsyncMock, patch
+from repositories.indice_cache import IndiceDocumentosCache
+
+@pytest.fixture
+def reloj():
+    """Fixture que controla el reloj monotónico usado por la caché"""
+    with patch('repositories.indice_cache.time.monotonic') as mock_monotonic:
+        mock_monotonic.return_value = 1000.0
+        yield mock_monotonic
+
+@pytest.mark.unit
+class TestIndiceDocumentosCache:
+    """Tests unitarios para la caché stale-while-revalidate del índice de documentos"""
+
+    @pytest.mark.asyncio
+    async def test_miss_y_hit(self, reloj):
+        """La primera solicitud descarga el índice y las siguientes lo sirven desde caché"""
+        cargar = AsyncMock(return_value={"123": ["doc1.pdf"]})
+        cache = IndiceDocumentosCache(cargar, ttl=60, max_stale=600)
+
+        assert await cache.obtener() == {"123": ["doc1.pdf"]}
+        reloj.return_value = 1030.0
+        assert await cache.obtener() == {"123": ["doc1.pdf"]}
+
+        assert cargar.await_count == 1
+        estadisticas = cache.estadisticas()
+        assert estadisticas["misses"] == 1
+        assert estadisticas["hits"] == 1
+        assert estadisticas["edad_segundos"] == 30.0
+        assert estadisticas["licitaciones"] == 1
+
+    @pytest.mark.asyncio
+    async def test_stale_while_revalidate(self, reloj):
+        """Con el TTL vencido se sirve el índice antiguo y se refresca en segundo plano"""
+        cargar = AsyncMock(side_effect=[{"123": ["doc1.pdf"]}, {"123": ["doc1.pdf", "doc2.pdf"]}])
+        cache = IndiceDocumentosCache(cargar, ttl=60, max_stale=600)
+        await cache.obtener()
+
+        reloj.return_value = 1100.0
+        assert await cache.obtener() == {"123": ["doc1.pdf"]}
+        await cache._tarea_refresco
+
+        assert await cache.obtener() == {"123": ["doc1.pdf", "doc2.pdf"]}
+        estadisticas = cache.estadisticas()
+        assert estadisticas["stale_hits"] == 1
+        assert estadisticas["refrescos"] == 2
+
+    @pytest.mark.asyncio
+    async def test_demasiado_antiguo_espera_descarga(self, reloj):
+        """Fuera de la ventana max_stale la solicitud espera el índice nuevo"""
+        cargar = AsyncMock(side_effect=[{"123": ["doc1.pdf"]}, {"456": ["doc3.pdf"]}])
+        cache = IndiceDocumentosCache(cargar, ttl=60, max_stale=600)
+        await cache.obtener()
+
+        reloj.return_value = 2000.0
+        assert await cache.obtener() == {"456": ["doc3.pdf"]}
+        assert cache.estadisticas()["misses"] == 2
+
+    @pytest.mark.asyncio
+    async def test_single_flight(self, reloj):
+        """Solicitudes concurrentes sin índice comparten una única descarga"""
+        async def cargar_lento():
+            await asyncio.sleep(0.01)
+            return {"123": ["doc1.pdf"]}
+
+        cargar = AsyncMock(side_effect=cargar_lento)
+        cache = IndiceDocumentosCache(cargar, ttl=60, max_stale=600)
+
+        resultados = await asyncio.gather(*[cache.obtener() for _ in range(10)])
+
+        assert cargar.await_count == 1
+        assert all(resultado == {"123": ["doc1.pdf"]} for resultado in resultados)
+
+    @pytest.mark.asyncio
+    async def test_error_sirve_version_anterior(self, reloj):
+        """Si la descarga falla y existe un índice previo, se sirve el anterior"""
+        cargar = AsyncMock(side_effect=[{"123": ["doc1.pdf"]}, Exception("Error de red")])
+        cache = IndiceDocumentosCache(cargar, ttl=60, max_stale=600)
+        await cache.obtener()
+
+        reloj.return_value = 2000.0
+        assert await cache.obtener() == {"123": ["doc1.pdf"]}
+        assert cache.estadisticas()["errores"] == 1
+
+    @pytest.mark.asyncio
+    async def test_error_sin_indice(self, reloj):
+        """Sin índice previo el error de descarga se propaga"""
+        cache = IndiceDocumentosCache(AsyncMock(side_effect=Exception("Error de red")), ttl=60, max_stale=600)
+        with pytest.raises(Exception, match="Error de red"):
+            await cache.obtener()
@@ -1,4 +1,5 @@
 import pytest
+import asyncio
 from unittest.mock import patch, MagicMock, AsyncMock
 from src.services.licitacion_service import LicitacionService
 from src.services.llm_service import LLMService
@@ -166,6 +167,36 @@ class TestLicitacionService:
         assert "DOCUMENTO 2" in resultado
         assert mock_repository.obtener_contenido_documento.call_count == 2 
 
+    @pytest.mark.asyncio
+    async def test_obtener_documentos_concurrente_conserva_orden(self, licitacion_service, mock_repository):
+        """Test para verificar que la descarga concurrente conserva orden, numeración y límite"""
+        rutas = [f"doc{i}.pdf" for i in range(1, 7)]
+        mock_docs = {"123": rutas}
+        en_curso = 0
+        maximo_en_curso = 0
+        
+        async def contenido_con_demora(ruta, codigo):
+            nonlocal en_curso, maximo_en_curso
+            en_curso += 1
+            maximo_en_curso = max(maximo_en_curso, en_curso)
+            # Los primeros documentos tardan más para forzar un orden de llegada inverso
+            await asyncio.sleep(0.01 * (len(rutas) - rutas.index(ruta)))
+            en_curso -= 1
+            if ruta == "doc3.pdf":
+                raise Exception("Error al obtener contenido")
+            return f"Contenido {ruta}"
+        
+        mock_repository.obtener_contenido_documento.side_effect = contenido_con_demora
+        licitacion_service.settings = MagicMock(DOCUMENT_FETCH_CONCURRENCY=3)
+        
+        resultado = await licitacion_service.obtener_documentos("123", mock_docs)
+        
+        posiciones = [resultado.index(f"=== DOCUMENTO {i}: doc{i}.pdf ===") for i in (1, 2, 4, 5, 6)]
+        assert posiciones == sorted(posiciones)
+        assert "DOCUMENTO 3" not in resultado
+        assert mock_repository.obtener_contenido_documento.call_count == 6
+        assert 1 < maximo_en_curso <= 3
+
     @pytest.mark.asyncio
     async def test_procesar_licitaciones_error_documentos(self, licitacion_service, mock_repository):
         """Test para procesar licitaciones cuando hay error al obtener documentos"""
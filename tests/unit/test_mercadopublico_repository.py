@@ -5,6 +5,13 @@ import json
 import aiohttp
 from datetime import datetime
 
+def crear_contexto_respuesta(response):
+    """Envuelve una respuesta mock en un context manager asíncrono"""
+    context = AsyncMock()
+    context.__aenter__.return_value = response
+    context.__aexit__.return_value = None
+    return context
+
 @pytest.fixture
 def mock_settings():
     """Fixture que proporciona configuraciones mock para el repositorio"""
@@ -18,6 +25,10 @@ def mock_settings():
     settings.USERNAME = "test_user"
     settings.PASSWORD = "test_pass"
     settings.EMPRESA_ID = "123"
+    settings.TOKEN_REFRESH_MARGIN = 60
+    settings.TOKEN_DEFAULT_TTL = 3600
+    settings.DOCUMENTOS_INDEX_TTL = 300
+    settings.DOCUMENTOS_INDEX_MAX_STALE = 3600
     return settings
 
 @pytest.fixture
@@ -32,8 +43,10 @@ def mock_response():
 def mock_session():
     """Fixture que proporciona una sesión mock"""
     session = MagicMock()
+    session.closed = False
     session.get = AsyncMock()
     session.post = AsyncMock()
+    session.close = AsyncMock()
     return session
 
 @pytest.mark.unit
@@ -47,44 +60,64 @@ class TestMercadoPublicoRepository:
             assert repo.testing == True
             assert repo.token == "test_token"
             assert repo.base_url == mock_settings.BASE_URL
-            assert "Authorization" in repo.session.headers
-            assert "Content-Type" in repo.session.headers
+            assert "Content-Type" in repo.headers
 
-    def test_inicializacion_produccion(self, mock_settings):
-        """Test de inicialización en modo producción"""
+    @pytest.mark.asyncio
+    async def test_inicializacion_produccion(self, mock_settings, mock_session):
+        """Test de inicialización en modo producción: el login es asíncrono y perezoso"""
+        auth_response = MagicMock()
+        auth_response.status = 200
+        auth_response.json = AsyncMock(return_value={"access_token": "prod_token", "expires_in": 1800})
+        mock_session.post = MagicMock(return_value=crear_contexto_respuesta(auth_response))
+        
         with patch('src.repositories.mercadopublico_repository.settings', mock_settings), \
-             patch('requests.Session.post') as mock_post:
-            
-            mock_post.return_value.status_code = 200
-            mock_post.return_value.json.return_value = {"access_token": "prod_token"}
+             patch('aiohttp.TCPConnector'), \
+             patch('aiohttp.ClientSession', return_value=mock_session):
             
             repo = MercadoPublicoRepository(testing=False)
             assert repo.testing == False
+            assert repo.token is None
+            mock_session.post.assert_not_called()
+            
+            token = await repo.autenticar()
+            assert token == "prod_token"
             assert repo.token == "prod_token"
             assert repo.base_url == mock_settings.BASE_URL
-            mock_post.assert_called_once()
+            mock_session.post.assert_called_once()
+            assert mock_session.post.call_args.args[0] == mock_settings.AUTH_URL
+            assert mock_session.post.call_args.kwargs["json"]["empresa_id"] == 123
 
-    def test_autenticacion_error_response(self, mock_settings):
+    @pytest.mark.asyncio
+    async def test_autenticacion_error_response(self, mock_settings, mock_session):
         """Test de autenticación con error en la respuesta"""
+        auth_response = MagicMock()
+        auth_response.status = 401
+        auth_response.json = AsyncMock(return_value={"msg": "Error de autenticación"})
+        mock_session.post = MagicMock(return_value=crear_contexto_respuesta(auth_response))
+        
         with patch('src.repositories.mercadopublico_repository.settings', mock_settings), \
-             patch('requests.Session.post') as mock_post:
-            
-            mock_post.return_value.status_code = 401
-            mock_post.return_value.json.return_value = {"msg": "Error de autenticación"}
+             patch('aiohttp.TCPConnector'), \
+             patch('aiohttp.ClientSession', return_value=mock_session):
             
+            repo = MercadoPublicoRepository(testing=False)
             with pytest.raises(ValueError, match="Error de autenticación: 401"):
-                MercadoPublicoRepository(testing=False)
+                await repo.autenticar()
 
-    def test_autenticacion_sin_token(self, mock_settings):
+    @pytest.mark.asyncio
+    async def test_autenticacion_sin_token(self, mock_settings, mock_session):
         """Test de autenticación cuando no se recibe token"""
+        auth_response = MagicMock()
+        auth_response.status = 200
+        auth_response.json = AsyncMock(return_value={})
+        mock_session.post = MagicMock(return_value=crear_contexto_respuesta(auth_response))
+        
         with patch('src.repositories.mercadopublico_repository.settings', mock_settings), \
-             patch('requests.Session.post') as mock_post:
-            
-            mock_post.return_value.status_code = 200
-            mock_post.return_value.json.return_value = {}
+             patch('aiohttp.TCPConnector'), \
+             patch('aiohttp.ClientSession', return_value=mock_session):
             
+            repo = MercadoPublicoRepository(testing=False)
             with pytest.raises(ValueError, match="Respuesta vacía del servidor"):
-                MercadoPublicoRepository(testing=False)
+                await repo.autenticar()
 
     @pytest.mark.asyncio
     async def test_obtener_documentos_procesados_testing(self, mock_settings):
@@ -97,11 +130,6 @@ class TestMercadoPublicoRepository:
     @pytest.mark.asyncio
     async def test_obtener_documentos_procesados_exito(self, mock_settings, mock_session, mock_response):
         """Test de obtención de documentos exitosa"""
-        # Mock para la autenticación
-        auth_response = MagicMock()
-        auth_response.status_code = 200
-        auth_response.json.return_value = {"access_token": "test_token"}
-        
         # Mock para la respuesta de documentos
         mock_response.status = 200
         mock_response.json = AsyncMock(return_value=[
@@ -110,11 +138,6 @@ class TestMercadoPublicoRepository:
             {"codigo_licitacion": "456", "ruta_documento": "doc3.pdf"}
         ])
         
-        # Configurar el mock de la sesión aiohttp
-        mock_session_context = AsyncMock()
-        mock_session_context.__aenter__.return_value = mock_session
-        mock_session_context.__aexit__.return_value = None
-        
         # Configurar el mock de la respuesta get
         mock_response_context = AsyncMock()
         mock_response_context.__aenter__.return_value = mock_response
@@ -123,8 +146,9 @@ class TestMercadoPublicoRepository:
         mock_session.get = MagicMock(return_value=mock_response_context)
         
         with patch('src.repositories.mercadopublico_repository.settings', mock_settings), \
-             patch('requests.Session.post', return_value=auth_response), \
-             patch('aiohttp.ClientSession', return_value=mock_session_context):
+             patch('repositories.token_manager.TokenManager.obtener_token', AsyncMock(return_value="test_token")), \
+             patch('aiohttp.TCPConnector'), \
+             patch('aiohttp.ClientSession', return_value=mock_session):
             
             repo = MercadoPublicoRepository(testing=False)
             resultado = await repo.obtener_documentos_procesados()
@@ -137,6 +161,44 @@ class TestMercadoPublicoRepository:
             assert "doc2.pdf" in resultado["123"]
             assert "doc3.pdf" in resultado["456"]
 
+    @pytest.mark.asyncio
+    async def test_obtener_documentos_procesados_cache(self, mock_settings, mock_session, mock_response):
+        """Test de reutilización del índice agrupado entre solicitudes"""
+        mock_response.status = 200
+        mock_response.json = AsyncMock(return_value=[
+            {"codigo_licitacion": "123", "ruta_documento": "doc1.pdf"}
+        ])
+        mock_session.get = MagicMock(side_effect=lambda *args, **kwargs: crear_contexto_respuesta(mock_response))
+        
+        with patch('src.repositories.mercadopublico_repository.settings', mock_settings), \
+             patch('repositories.token_manager.TokenManager.obtener_token', AsyncMock(return_value="test_token")), \
+             patch('aiohttp.TCPConnector'), \
+             patch('aiohttp.ClientSession', return_value=mock_session):
+            
+            repo = MercadoPublicoRepository(testing=False)
+            primero = await repo.obtener_documentos_procesados()
+            segundo = await repo.obtener_documentos_procesados()
+            
+            assert primero == segundo == {"123": ["doc1.pdf"]}
+            assert mock_session.get.call_count == 1
+            estadisticas = repo.estadisticas_indice()
+            assert estadisticas["misses"] == 1
+            assert estadisticas["hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_obtener_documentos_procesados_error(self, mock_settings, mock_session, mock_response):
+        """Test de obtención de documentos con error del backend"""
+        mock_response.status = 500
+        mock_session.get = MagicMock(return_value=crear_contexto_respuesta(mock_response))
+        
+        with patch('src.repositories.mercadopublico_repository.settings', mock_settings), \
+             patch('repositories.token_manager.TokenManager.obtener_token', AsyncMock(return_value="test_token")), \
+             patch('aiohttp.TCPConnector'), \
+             patch('aiohttp.ClientSession', return_value=mock_session):
+            
+            repo = MercadoPublicoRepository(testing=False)
+            assert await repo.obtener_documentos_procesados() == {}
+
     @pytest.mark.asyncio
     async def test_obtener_contenido_documento_testing(self, mock_settings):
         """Test de obtención de contenido en modo testing"""
@@ -148,20 +210,10 @@ class TestMercadoPublicoRepository:
     @pytest.mark.asyncio
     async def test_obtener_contenido_documento_exito(self, mock_settings, mock_session, mock_response):
         """Test de obtención de contenido exitosa"""
-        # Mock para la autenticación
-        auth_response = MagicMock()
-        auth_response.status_code = 200
-        auth_response.json.return_value = {"access_token": "test_token"}
-        
         # Mock para la respuesta del contenido
         mock_response.status = 200
         mock_response.json = AsyncMock(return_value={"contenido": "Contenido del documento"})
         
-        # Configurar el mock de la sesión aiohttp
-        mock_session_context = AsyncMock()
-        mock_session_context.__aenter__.return_value = mock_session
-        mock_session_context.__aexit__.return_value = None
-        
         # Configurar el mock de la respuesta get
         mock_response_context = AsyncMock()
         mock_response_context.__aenter__.return_value = mock_response
@@ -170,8 +222,9 @@ class TestMercadoPublicoRepository:
         mock_session.get = MagicMock(return_value=mock_response_context)
         
         with patch('src.repositories.mercadopublico_repository.settings', mock_settings), \
-             patch('requests.Session.post', return_value=auth_response), \
-             patch('aiohttp.ClientSession', return_value=mock_session_context):
+             patch('repositories.token_manager.TokenManager.obtener_token', AsyncMock(return_value="test_token")), \
+             patch('aiohttp.TCPConnector'), \
+             patch('aiohttp.ClientSession', return_value=mock_session):
             
             repo = MercadoPublicoRepository(testing=False)
             resultado = await repo.obtener_contenido_documento("ruta.pdf", "123")
@@ -190,20 +243,10 @@ class TestMercadoPublicoRepository:
     @pytest.mark.asyncio
     async def test_obtener_respuesta_ia_exito(self, mock_settings, mock_session, mock_response):
         """Test de obtención de respuesta IA exitosa"""
-        # Mock para la autenticación
-        auth_response = MagicMock()
-        auth_response.status_code = 200
-        auth_response.json.return_value = {"access_token": "test_token"}
-        
         # Mock para la respuesta IA
         mock_response.status = 200
         mock_response.json = AsyncMock(return_value={"respuesta": "Respuesta de prueba"})
         
-        # Configurar el mock de la sesión aiohttp
-        mock_session_context = AsyncMock()
-        mock_session_context.__aenter__.return_value = mock_session
-        mock_session_context.__aexit__.return_value = None
-        
         # Configurar el mock de la respuesta get
         mock_response_context = AsyncMock()
         mock_response_context.__aenter__.return_value = mock_response
@@ -212,8 +255,9 @@ class TestMercadoPublicoRepository:
         mock_session.get = MagicMock(return_value=mock_response_context)
         
         with patch('src.repositories.mercadopublico_repository.settings', mock_settings), \
-             patch('requests.Session.post', return_value=auth_response), \
-             patch('aiohttp.ClientSession', return_value=mock_session_context):
+             patch('repositories.token_manager.TokenManager.obtener_token', AsyncMock(return_value="test_token")), \
+             patch('aiohttp.TCPConnector'), \
+             patch('aiohttp.ClientSession', return_value=mock_session):
             
             repo = MercadoPublicoRepository(testing=False)
             resultado = await repo.obtener_respuesta_ia("123")
@@ -224,20 +268,10 @@ class TestMercadoPublicoRepository:
     @pytest.mark.asyncio
     async def test_obtener_respuesta_ia_no_encontrada(self, mock_settings, mock_session, mock_response):
         """Test de obtención de respuesta IA cuando no existe"""
-        # Mock para la autenticación
-        auth_response = MagicMock()
-        auth_response.status_code = 200
-        auth_response.json.return_value = {"access_token": "test_token"}
-        
         # Mock para la respuesta IA
         mock_response.status = 404
         mock_response.json = AsyncMock(return_value={"error": "No encontrado"})
         
-        # Configurar el mock de la sesión aiohttp
-        mock_session_context = AsyncMock()
-        mock_session_context.__aenter__.return_value = mock_session
-        mock_session_context.__aexit__.return_value = None
-        
         # Configurar el mock de la respuesta get
         mock_response_context = AsyncMock()
         mock_response_context.__aenter__.return_value = mock_response
@@ -246,8 +280,9 @@ class TestMercadoPublicoRepository:
         mock_session.get = MagicMock(return_value=mock_response_context)
         
         with patch('src.repositories.mercadopublico_repository.settings', mock_settings), \
-             patch('requests.Session.post', return_value=auth_response), \
-             patch('aiohttp.ClientSession', return_value=mock_session_context):
+             patch('repositories.token_manager.TokenManager.obtener_token', AsyncMock(return_value="test_token")), \
+             patch('aiohttp.TCPConnector'), \
+             patch('aiohttp.ClientSession', return_value=mock_session):
             
             repo = MercadoPublicoRepository(testing=False)
             resultado = await repo.obtener_respuesta_ia("123")
@@ -266,20 +301,10 @@ class TestMercadoPublicoRepository:
     @pytest.mark.asyncio
     async def test_guardar_respuesta_ia_exito(self, mock_settings, mock_session, mock_response):
         """Test de guardado de respuesta IA exitoso"""
-        # Mock para la autenticación
-        auth_response = MagicMock()
-        auth_response.status_code = 200
-        auth_response.json.return_value = {"access_token": "test_token"}
-        
         # Mock para la respuesta del guardado
         mock_response.status = 200
         mock_response.json = AsyncMock(return_value={"mensaje": "Guardado exitoso"})
         
-        # Configurar el mock de la sesión aiohttp
-        mock_session_context = AsyncMock()
-        mock_session_context.__aenter__.return_value = mock_session
-        mock_session_context.__aexit__.return_value = None
-        
         # Configurar el mock de la respuesta post
         mock_response_context = AsyncMock()
         mock_response_context.__aenter__.return_value = mock_response
@@ -288,8 +313,9 @@ class TestMercadoPublicoRepository:
         mock_session.post = MagicMock(return_value=mock_response_context)
         
         with patch('src.repositories.mercadopublico_repository.settings', mock_settings), \
-             patch('requests.Session.post', return_value=auth_response), \
-             patch('aiohttp.ClientSession', return_value=mock_session_context):
+             patch('repositories.token_manager.TokenManager.obtener_token', AsyncMock(return_value="test_token")), \
+             patch('aiohttp.TCPConnector'), \
+             patch('aiohttp.ClientSession', return_value=mock_session):
             
             repo = MercadoPublicoRepository(testing=False)
             resultado = await repo.guardar_respuesta_ia("123", "Análisis de prueba")
@@ -300,20 +326,10 @@ class TestMercadoPublicoRepository:
     @pytest.mark.asyncio
     async def test_guardar_respuesta_ia_error(self, mock_settings, mock_session, mock_response):
         """Test de guardado de respuesta IA con error"""
-        # Mock para la autenticación
-        auth_response = MagicMock()
-        auth_response.status_code = 200
-        auth_response.json.return_value = {"access_token": "test_token"}
-        
         # Mock para la respuesta del guardado
         mock_response.status = 500
         mock_response.json = AsyncMock(return_value={"error": "Error interno del servidor"})
         
-        # Configurar el mock de la sesión aiohttp
-        mock_session_context = AsyncMock()
-        mock_session_context.__aenter__.return_value = mock_session
-        mock_session_context.__aexit__.return_value = None
-        
         # Configurar el mock de la respuesta post
         mock_response_context = AsyncMock()
         mock_response_context.__aenter__.return_value = mock_response
@@ -322,8 +338,9 @@ class TestMercadoPublicoRepository:
         mock_session.post = MagicMock(return_value=mock_response_context)
         
         with patch('src.repositories.mercadopublico_repository.settings', mock_settings), \
-             patch('requests.Session.post', return_value=auth_response), \
-             patch('aiohttp.ClientSession', return_value=mock_session_context):
+             patch('repositories.token_manager.TokenManager.obtener_token', AsyncMock(return_value="test_token")), \
+             patch('aiohttp.TCPConnector'), \
+             patch('aiohttp.ClientSession', return_value=mock_session):
             
             repo = MercadoPublicoRepository(testing=False)
             resultado = await repo.guardar_respuesta_ia("123", "Análisis de prueba")
@@ -331,22 +348,52 @@ class TestMercadoPublicoRepository:
             assert resultado is False
             mock_session.post.assert_called_once()
 
-    def test_make_request_reautenticacion(self, mock_settings):
-        """Test de reautenticación en _make_request"""
+    @pytest.mark.asyncio
+    async def test_sesion_http_compartida(self, mock_settings, mock_session, mock_response):
+        """Test de reutilización de la sesión HTTP entre peticiones"""
+        mock_response.status = 200
+        mock_response.json = AsyncMock(return_value={"contenido": "Contenido de prueba"})
+        
+        mock_response_context = AsyncMock()
+        mock_response_context.__aenter__.return_value = mock_response
+        mock_response_context.__aexit__.return_value = None
+        
+        mock_session.get = MagicMock(return_value=mock_response_context)
+        
         with patch('src.repositories.mercadopublico_repository.settings', mock_settings), \
-             patch('requests.Session.request') as mock_request, \
-             patch('requests.Session.post') as mock_post:
+             patch('repositories.token_manager.TokenManager.obtener_token', AsyncMock(return_value="test_token")), \
+             patch('aiohttp.TCPConnector') as mock_connector, \
+             patch('aiohttp.ClientSession', return_value=mock_session) as mock_client_session:
+            
+            repo = MercadoPublicoRepository(testing=False)
+            for idx in range(3):
+                await repo.obtener_contenido_documento(f"doc{idx}.pdf", "123")
+            
+            assert mock_client_session.call_count == 1
+            assert mock_connector.call_count == 1
+            assert mock_session.get.call_count == 3
+            headers = mock_session.get.call_args.kwargs["headers"]
+            assert headers["Authorization"] == "Bearer test_token"
             
-            mock_post.return_value.status_code = 200
-            mock_post.return_value.json.return_value = {"access_token": "new_token"}
-            mock_request.return_value.status_code = 200
-            mock_request.return_value.json.return_value = {"data": "test"}
+            await repo.cerrar()
+            mock_session.close.assert_awaited_once()
+            assert repo._http_session is None
+
+    @pytest.mark.asyncio
+    async def test_token_rechazado_invalida(self, mock_settings, mock_session, mock_response):
+        """Test de invalidación del token cuando el backend responde 401"""
+        mock_response.status = 401
+        mock_session.get = MagicMock(return_value=crear_contexto_respuesta(mock_response))
+        
+        with patch('src.repositories.mercadopublico_repository.settings', mock_settings), \
+             patch('aiohttp.TCPConnector'), \
+             patch('aiohttp.ClientSession', return_value=mock_session):
             
             repo = MercadoPublicoRepository(testing=False)
-            repo.token_expiry = datetime.now().timestamp() - 3600  # Token expirado
+            repo.token_manager.token = "token_antiguo"
+            repo.token_manager.expiracion = datetime.now().timestamp() + 3600
             
-            resultado = repo._make_request("GET", "http://test.url")
+            resultado = await repo.obtener_contenido_documento("doc1.pdf", "123")
             
-            assert resultado == {"data": "test"}
-            assert mock_post.call_count == 2  # Una vez en init y otra en reautenticación
-            assert mock_request.call_count == 1 
\ No newline at end of file
+            assert resultado == ""
+            assert repo.token_expiry == 0
@@ -0,0 +1,135 @@
+import pytest
+import asyncio
+import base64
+import json
+import time
+from unittest.mock import MagicMock, AsyncMock
+from repositories.token_manager import TokenManager
+
+def crear_jwt(claims: dict) -> str:
+    """Construye un JWT sin firma válida para pruebas"""
+    def codificar(datos: dict) -> str:
+        return base64.urlsafe_b64encode(json.dumps(datos).encode()).decode().rstrip("=")
+    return f"{codificar({'alg': 'HS256'})}.{codificar(claims)}.firma"
+
+def crear_sesion(respuestas, demora: float = 0):
+    """Crea una sesión mock cuyo post retorna las respuestas indicadas en orden"""
+    session = MagicMock()
+    llamadas = iter(respuestas)
+
+    def post(*args, **kwargs):
+        status, datos = next(llamadas)
+        response = MagicMock()
+        response.status = status
+        response.json = AsyncMock(return_value=datos)
+
+        async def entrar():
+            await asyncio.sleep(demora)
+            return response
+
+        context = MagicMock()
+        context.__aenter__ = AsyncMock(side_effect=entrar)
+        context.__aexit__ = AsyncMock(return_value=None)
+        return context
+
+    session.post = MagicMock(side_effect=post)
+    return session
+
+def crear_manager(session, **kwargs) -> TokenManager:
+    return TokenManager(
+        AsyncMock(return_value=session),
+        auth_url="http://api.test/auth",
+        credenciales={"username": "test_user", "password": "test_pass", "empresa_id": 1},
+        **kwargs
+    )
+
+@pytest.mark.unit
+class TestTokenManager:
+    """Tests unitarios para el gestor asíncrono de tokens"""
+
+    def test_modo_testing(self):
+        """En modo testing se usa un token de prueba sin login"""
+        manager = TokenManager(AsyncMock(), auth_url="", credenciales={}, testing=True)
+        assert manager.token == "test_token"
+
+    @pytest.mark.asyncio
+    async def test_single_flight(self):
+        """N solicitudes concurrentes con token expirado disparan un único login"""
+        session = crear_sesion([(200, {"access_token": "nuevo_token", "expires_in": 600})], demora=0.05)
+        manager = crear_manager(session)
+
+        tokens = await asyncio.gather(*[manager.obtener_token() for _ in range(20)])
+
+        assert session.post.call_count == 1
+        assert all(token == "nuevo_token" for token in tokens)
+
+    @pytest.mark.asyncio
+    async def test_expiracion_desde_expires_in(self):
+        """La expiración se toma de expires_in cuando la respuesta lo incluye"""
+        session = crear_sesion([(200, {"access_token": "token", "expires_in": 120})])
+        manager = crear_manager(session)
+
+        await manager.obtener_token()
+
+        assert manager.expiracion == pytest.approx(time.time() + 120, abs=2)
+
+    @pytest.mark.asyncio
+    async def test_expiracion_desde_jwt(self):
+        """Sin expires_in, la expiración se lee del claim exp del JWT"""
+        exp = int(time.time()) + 900
+        session = crear_sesion([(200, {"token": crear_jwt({"exp": exp})})])
+        manager = crear_manager(session)
+
+        await manager.obtener_token()
+
+        assert manager.expiracion == exp
+
+    @pytest.mark.asyncio
+    async def test_expiracion_por_defecto(self):
+        """Sin información de expiración se usa el TTL por defecto"""
+        session = crear_sesion([(200, {"access_token": "opaco"})])
+        manager = crear_manager(session, ttl_por_defecto=300)
+
+        await manager.obtener_token()
+
+        assert manager.expiracion == pytest.approx(time.time() + 300, abs=2)
+
+    @pytest.mark.asyncio
+    async def test_refresco_proactivo(self):
+        """Dentro del margen se retorna el token vigente y se renueva en segundo plano"""
+        session = crear_sesion([(200, {"access_token": "token_renovado", "expires_in": 600})])
+        manager = crear_manager(session, margen_refresco=60)
+        manager.token = "token_vigente"
+        manager.expiracion = time.time() + 30
+
+        token = await manager.obtener_token()
+        assert token == "token_vigente"
+
+        await manager._tarea_refresco
+        assert manager.token == "token_renovado"
+        assert session.post.call_count == 1
+
+    @pytest.mark.asyncio
+    async def test_error_propagado_a_todos(self):
+        """Un login fallido se propaga a todas las solicitudes en espera"""
+        session = crear_sesion([(401, {"msg": "Credenciales inválidas"})], demora=0.01)
+        manager = crear_manager(session)
+
+        resultados = await asyncio.gather(*[manager.obtener_token() for _ in range(5)], return_exceptions=True)
+
+        assert session.post.call_count == 1
+        assert all(isinstance(r, ValueError) for r in resultados)
+
+    @pytest.mark.asyncio
+    async def test_invalidar(self):
+        """invalidar fuerza un nuevo login en la siguiente solicitud"""
+        session = crear_sesion([
+            (200, {"access_token": "primero", "expires_in": 600}),
+            (200, {"access_token": "segundo", "expires_in": 600})
+        ])
+        manager = crear_manager(session)
+
+        assert await manager.obtener_token() == "primero"
+        manager.invalidar()
+        assert await manager.obtener_token() == "segundo"
+        assert session.post.call_count == 2